@@ -1,3 +1,3 @@
-from .core import lazy_import, lazy_from_import, speed_up_modules
+from .core import attach_lazy, lazy_import, lazy_from_import, speed_up_modules
 
-__all__ = ["lazy_import", "lazy_from_import","speed_up_modules"]
+__all__ = ["attach_lazy", "lazy_import", "lazy_from_import","speed_up_modules"]
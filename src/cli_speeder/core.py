@@ -1,32 +1,48 @@
+import abc
 import importlib
 import importlib.util
 import importlib.abc
+import importlib.machinery
+import operator
 import sys
 import os
 import threading
-from typing import Any, Callable, Optional, TypeVar, Generic, List, Set
+import types
+from typing import Any, Callable, Dict, Optional, TypeVar, Generic, List, Set, Tuple
 
 _EAGER_MODE = os.environ.get("CLI_SPEEDER_EAGER", "0") == "1"
 
 T = TypeVar("T")
 
-class _LazyProxy(Generic[T]):
-    __slots__ = ("_loader_func", "_target", "__weakref__")
+# Modules already resolved for LazyObjectProxy, keyed by (module_name, package).
+_MODULE_CACHE: Dict[Tuple[str, Optional[str]], types.ModuleType] = {}
 
-    def __init__(self, loader_func: Callable[[], T]):
-        object.__setattr__(self, "_loader_func", loader_func)
-        object.__setattr__(self, "_target", None)
-        if os.environ.get("CLI_SPEEDER_EAGER", "0") == "1":
-            self._ensure_loaded()
+class _LazyProxy(Generic[T], metaclass=abc.ABCMeta):
+    __slots__ = ("_target",)
+
+    def __init__(self, _eager: bool = _EAGER_MODE):
+        if _eager:
+            _bind_target(self, self._load())
+        else:
+            _set_target(self, None)
+
+    @abc.abstractmethod
+    def _load(self) -> T:
+        """Imports and returns the proxied object; called at most once."""
 
     def _ensure_loaded(self) -> T:
-        if self._target is None:
-            target = self._loader_func()
-            object.__setattr__(self, "_target", target)
-        return self._target
+        target = self._target
+        if target is not None:
+            return target
+        target = self._load()
+        _bind_target(self, target)
+        return target
 
     def __getattr__(self, name: str) -> Any:
-        return getattr(self._ensure_loaded(), name)
+        target = self._target
+        if target is None:
+            target = self._ensure_loaded()
+        return getattr(target, name)
 
     def __setattr__(self, name: str, value: Any) -> None:
         setattr(self._ensure_loaded(), name, value)
@@ -45,93 +61,332 @@ class _LazyProxy(Generic[T]):
         return str(self._target)
 
     def __call__(self, *args, **kwargs) -> Any:
-        return self._ensure_loaded()(*args, **kwargs)
+        target = self._target
+        if target is None:
+            target = self._ensure_loaded()
+        return target(*args, **kwargs)
     
     def __getitem__(self, key: Any) -> Any:
-        return self._ensure_loaded()[key]
+        target = self._target
+        if target is None:
+            target = self._ensure_loaded()
+        return target[key]
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # A class body without a docstring still gets __doc__ = None, which would
+        # shadow the property below; keep any docstring the subclass declares.
+        if cls.__dict__.get("__doc__") is None:
+            cls.__doc__ = _LazyProxy.__dict__["__doc__"]
 
     @property
     def __doc__(self) -> Optional[str]:
-        return self._ensure_loaded().__doc__
+        # Passive introspection (pydoc, IPython "?") must not trigger the import.
+        target = self._target
+        if target is None:
+            return "<lazy proxy, not yet loaded>"
+        return target.__doc__
 
-class LazyModuleProxy(_LazyProxy[Any]):
-    __slots__ = ("_module_name",)
-    def __init__(self, module_name: str, package: Optional[str] = None):
-        def loader():
-            return importlib.import_module(module_name, package=package)
-        object.__setattr__(self, "_module_name", module_name)
-        super().__init__(loader)
+    @property
+    def __class__(self) -> type:
+        # Report the target's type once loaded, without forcing a load for isinstance().
+        target = self._target
+        if target is None:
+            return type(self)
+        return type(target)
 
-    def __repr__(self) -> str:
-        if self._target is None:
-            return f"<LazyModuleProxy: '{self._module_name}' (not loaded)>"
-        return repr(self._target)
+# Bound slot setter; skips the generic object.__setattr__ dispatch on first load.
+_set_target = _LazyProxy._target.__set__
+
+# object's own __class__ setter; the __class__ property above shadows it.
+_set_class = object.__dict__["__class__"].__set__
+
+def _special_method(name: str) -> Callable[..., Any]:
+    # Look the method up on the type, the way the interpreter does for dunders.
+    def call(target: Any, *args: Any) -> Any:
+        return getattr(type(target), name)(target, *args)
+    return call
+
+def _reflected(op: Callable[[Any, Any], Any]) -> Callable[[Any, Any], Any]:
+    def call(target: Any, other: Any) -> Any:
+        return op(other, target)
+    return call
+
+# Dunders the interpreter looks up on the type, so __getattr__ never sees them.
+# Builtins are used where they exist so fallbacks (e.g. bool() without __bool__) still apply.
+# None of these are inspected by collections.abc, so every proxy can carry them.
+_FORWARDED_DUNDERS: Dict[str, Callable[..., Any]] = {
+    "__bool__": bool,
+    "__hash__": hash,
+    "__eq__": operator.eq,
+    "__ne__": operator.ne,
+    "__lt__": operator.lt,
+    "__le__": operator.le,
+    "__gt__": operator.gt,
+    "__ge__": operator.ge,
+    "__add__": operator.add,
+    "__radd__": _reflected(operator.add),
+    "__sub__": operator.sub,
+    "__rsub__": _reflected(operator.sub),
+    "__mul__": operator.mul,
+    "__rmul__": _reflected(operator.mul),
+    "__truediv__": operator.truediv,
+    "__rtruediv__": _reflected(operator.truediv),
+}
+
+# Protocol dunders that collections.abc hooks look for on the type. Giving them
+# to every proxy would make e.g. a proxied int an Iterable, so a proxy only
+# gets the ones its target's type defines, once loaded (see _bind_target).
+_PROTOCOL_DUNDERS: Dict[str, Callable[..., Any]] = {
+    "__iter__": iter,
+    "__next__": next,
+    "__len__": len,
+    "__contains__": operator.contains,
+    "__enter__": _special_method("__enter__"),
+    "__exit__": _special_method("__exit__"),
+    "__aiter__": _special_method("__aiter__"),
+    "__anext__": _special_method("__anext__"),
+}
+
+def _make_forwarder(name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    def forwarder(self: _LazyProxy[Any], *args: Any) -> Any:
+        target = self._target
+        if target is None:
+            target = self._ensure_loaded()
+        return func(target, *args)
+    forwarder.__name__ = forwarder.__qualname__ = name
+    return forwarder
+
+for _name, _func in _FORWARDED_DUNDERS.items():
+    setattr(_LazyProxy, _name, _make_forwarder(_name, _func))
+
+_PROTOCOL_FORWARDERS = {
+    name: _make_forwarder(name, func) for name, func in _PROTOCOL_DUNDERS.items()
+}
+
+# Proxy subclasses carrying a given set of protocol forwarders, shared by all proxies.
+_SCOPED_CLASSES: Dict[Tuple[type, Tuple[str, ...]], type] = {}
+
+def _bind_target(proxy: _LazyProxy[Any], target: Any) -> None:
+    _set_target(proxy, target)
+    target_type = type(target)
+    names = tuple(n for n in _PROTOCOL_DUNDERS if getattr(target_type, n, None) is not None)
+    if not names:
+        return
+    proxy_type = type(proxy)
+    key = (proxy_type, names)
+    scoped = _SCOPED_CLASSES.get(key)
+    if scoped is None:
+        namespace: Dict[str, Any] = {n: _PROTOCOL_FORWARDERS[n] for n in names}
+        namespace.update(
+            __slots__=(), __module__=proxy_type.__module__, __qualname__=proxy_type.__qualname__
+        )
+        scoped = type(proxy_type)(proxy_type.__name__, (proxy_type,), namespace)
+        _SCOPED_CLASSES[key] = scoped
+    _set_class(proxy, scoped)
 
 class LazyObjectProxy(_LazyProxy[Any]):
-    __slots__ = ("_module_name", "_object_name")
+    __slots__ = ("_module_name", "_object_name", "_package")
     def __init__(self, module_name: str, object_name: str, package: Optional[str] = None):
-        def loader():
-            mod = importlib.import_module(module_name, package=package)
-            return getattr(mod, object_name)
         object.__setattr__(self, "_module_name", module_name)
         object.__setattr__(self, "_object_name", object_name)
-        super().__init__(loader)
+        object.__setattr__(self, "_package", package)
+        super().__init__()
+
+    def _load(self) -> Any:
+        key = (self._module_name, self._package)
+        mod = _MODULE_CACHE.get(key)
+        # Only trust the cache while the module is still the one in sys.modules.
+        if mod is None or sys.modules.get(mod.__name__) is not mod:
+            mod = importlib.import_module(self._module_name, package=self._package)
+            _MODULE_CACHE[key] = mod
+        return getattr(mod, self._object_name)
 
     def __repr__(self) -> str:
         if self._target is None:
             return f"<LazyObjectProxy: '{self._module_name}.{self._object_name}' (not loaded)>"
         return repr(self._target)
 
+class _ParentFirstLoader(importlib.abc.Loader):
+    """
+    Wraps a submodule's loader so a lazily imported parent package runs its
+    body first, keeping the normal parent-before-child import order.
+    """
+    def __init__(self, loader: Any, parent: str):
+        self.loader = loader
+        self.parent = parent
+
+    def create_module(self, spec: Any) -> Any:
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module: types.ModuleType) -> None:
+        # Hand the real loader back to the module before anything runs.
+        module.__spec__.loader = module.__loader__ = self.loader
+        parent = sys.modules.get(self.parent)
+        if parent is not None:
+            getattr(parent, "__name__")  # touching a lazy parent executes it
+        self.loader.exec_module(module)
+
+def _lazy_module(fullname: str) -> types.ModuleType:
+    module = sys.modules.get(fullname)
+    if module is not None:
+        return module
+
+    parent, _, child = fullname.rpartition(".")
+    path = None
+    if parent:
+        # Parents are made lazy too; read __path__ straight from the namespace
+        # so a lazy parent is not executed just to locate its child.
+        parent_module = _lazy_module(parent)
+        path = object.__getattribute__(parent_module, "__dict__").get("__path__")
+        if path is None:
+            raise ModuleNotFoundError(
+                f"No module named {fullname!r}; {parent!r} is not a package", name=fullname
+            )
+
+    # Same lookup the import system does, minus importing the parent.
+    spec = None
+    for finder in sys.meta_path:
+        find_spec = getattr(finder, "find_spec", None)
+        if find_spec is not None:
+            spec = find_spec(fullname, path)
+            if spec is not None:
+                break
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {fullname!r}", name=fullname)
+    if spec.loader is None:
+        return importlib.import_module(fullname)
+
+    # The importlib.util.LazyLoader recipe: the placeholder registered in
+    # sys.modules *is* the real module. Its body runs on first attribute
+    # access, after which it is a plain ModuleType with no proxy in the way.
+    loader = spec.loader
+    if isinstance(loader, importlib.util.LazyLoader):
+        loader = loader.loader
+    if parent:
+        loader = _ParentFirstLoader(loader, parent)
+    spec.loader = importlib.util.LazyLoader(loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[fullname] = module
+    spec.loader.exec_module(module)
+
+    # Bind the submodule on its parent package, as a normal import would.
+    if parent:
+        setattr(sys.modules[parent], child, module)
+    return module
+
 def lazy_import(name: str, package: Optional[str] = None) -> Any:
-    return LazyModuleProxy(name, package)
+    if _EAGER_MODE:
+        return importlib.import_module(name, package)
+    return _lazy_module(importlib.util.resolve_name(name, package))
 
 def lazy_from_import(module_name: str, class_name: str, package: Optional[str] = None) -> Any:
     return LazyObjectProxy(module_name, class_name, package)
 
+def attach_lazy(
+    package_name: str, submodules: Dict[str, str]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Builds a PEP 562 module-level __getattr__ and __dir__ for a package.
+
+    Usage (in your package's __init__.py):
+        __getattr__, __dir__ = attach_lazy(__name__, {"heavy": "._heavy"})
+
+    Each key is a name the package exports; the value is the (possibly
+    relative) module that defines it. The first access imports that module
+    and stores the attribute in the package namespace, so later lookups are
+    plain module attribute access and never reach __getattr__ again.
+    """
+    def __getattr__(name: str) -> Any:
+        path = submodules.get(name)
+        if path is None:
+            raise AttributeError(f"module {package_name!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(path, package_name), name)
+        setattr(sys.modules[package_name], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package_name])) | set(submodules))
+
+    return __getattr__, __dir__
+
+
 
+_EAGER_LOADERS = (importlib.machinery.BuiltinImporter, importlib.machinery.FrozenImporter)
 
 class _LazyFinder(importlib.abc.MetaPathFinder):
     """
     A custom importer that intercepts specific module names and 
     returns a LazyLoader.
     
-    Uses thread-local storage to prevent recursion during delegation.
+    Tracks the ids of threads currently delegating to prevent recursion.
     """
     def __init__(self, names: List[str]):
-        self.names = set(names)
-        self._local = threading.local()
+        self.names = frozenset(names)
+        # Under the GIL, set add/discard is atomic and cheaper than threading.local.
+        self._in_lookup: Set[int] = set()
+        self._cached_finders: Optional[List[Any]] = None
+        self._meta_path_snapshot: List[Any] = []
+        # Fullnames known to resolve to builtin/frozen specs; never worth wrapping.
+        self._passthrough: Set[str] = set()
+
+    def _other_finders(self) -> List[Any]:
+        # Rebuild whenever sys.meta_path differs from the snapshot, including
+        # same-length in-place edits. List comparison runs in C and checks
+        # identity before __eq__, so the unchanged case allocates nothing.
+        meta_path = sys.meta_path
+        if self._cached_finders is None or self._meta_path_snapshot != meta_path:
+            self._cached_finders = [
+                f for f in meta_path if f is not self and hasattr(f, "find_spec")
+            ]
+            self._meta_path_snapshot = list(meta_path)
+        return self._cached_finders
+
+    def _reset_caches(self) -> None:
+        self._cached_finders = None
+        self._meta_path_snapshot = []
+        # Thread ids from another process (or a dead thread) must not block lookups.
+        self._in_lookup.clear()
 
     def find_spec(self, fullname, path, target=None):
         # RECURSION CHECK:
         # If we are already inside a find_spec call on this thread, ignore this call.
-        if getattr(self._local, "in_lookup", False):
+        tid = threading.get_ident()
+        if tid in self._in_lookup:
             return None
 
         # We only care if the TOP LEVEL package matches our list
-        root_pkg = fullname.split(".")[0]
+        root_pkg = fullname.partition(".")[0]
         if root_pkg not in self.names:
             return None
 
+        # Already imported (e.g. importlib.reload): nothing to make lazy.
+        if fullname in sys.modules or fullname in self._passthrough:
+            return None
+
         # DELEGATION (With Guard):
         try:
-            self._local.in_lookup = True  # LOCK
+            self._in_lookup.add(tid)  # LOCK
             
             # Iterate over other finders manually
             spec = None
-            for finder in sys.meta_path:
-                if finder is self: 
-                    continue
+            for finder in self._other_finders():
                 try:
-                    if hasattr(finder, "find_spec"):
-                        spec = finder.find_spec(fullname, path, target)
-                        if spec:
-                            break
+                    spec = finder.find_spec(fullname, path, target)
+                    if spec:
+                        break
                 except (ImportError, AttributeError):
                     continue
 
             if spec is None:
                 return None
 
+            # Builtin and frozen modules are already in the interpreter;
+            # wrapping them only adds overhead.
+            if spec.loader in _EAGER_LOADERS:
+                self._passthrough.add(fullname)
+                return spec
+
             # WRAP IN LAZY LOADER
             # Only wrap if it has a loader and isn't already lazy
             if spec.loader and not isinstance(spec.loader, importlib.util.LazyLoader):
@@ -140,42 +395,94 @@ class _LazyFinder(importlib.abc.MetaPathFinder):
             return spec
             
         finally:
-            self._local.in_lookup = False  # UNLOCK
+            self._in_lookup.discard(tid)  # UNLOCK
 
 # Global reference
 _INSTALLED_FINDER = None
 
-def speed_up_modules(modules: List[str]):
+def _reset_after_fork() -> None:
+    """Clears finder state inherited by a forked child and re-installs it if needed."""
+    if _INSTALLED_FINDER is None:
+        return
+    _INSTALLED_FINDER._reset_caches()
+    if _INSTALLED_FINDER not in sys.meta_path:
+        sys.meta_path.insert(0, _INSTALLED_FINDER)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+# Started preload threads, so callers (and tests) can wait for them to finish.
+_PRELOAD_THREADS: List[threading.Thread] = []
+
+# Cached result of _lazy_loader_locks(); None until first probed.
+_LAZY_LOADER_LOCKS: Optional[bool] = None
+
+class _ProbeLoader(importlib.abc.Loader):
+    def exec_module(self, module: types.ModuleType) -> None:
+        pass
+
+def _lazy_loader_locks() -> bool:
+    """
+    Whether importlib.util.LazyLoader serialises the first attribute access.
+
+    On 3.8-3.11 and early 3.12 releases LazyLoader flips the module's class
+    before its body runs and takes no lock, so a second thread touching the
+    module mid-preload sees it half-initialised. The fix landed in a 3.12
+    patch release, so it is detected by the lock it keeps in loader_state
+    rather than by version number.
+    """
+    global _LAZY_LOADER_LOCKS
+    if _LAZY_LOADER_LOCKS is None:
+        spec = importlib.util.spec_from_loader(
+            "_cli_speeder_probe", importlib.util.LazyLoader(_ProbeLoader())
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _LAZY_LOADER_LOCKS = "lock" in (spec.loader_state or {})
+    return _LAZY_LOADER_LOCKS
+
+def _warm(modules: List[str]) -> None:
+    """Imports and executes each module; runs on the preload thread."""
+    for name in modules:
+        try:
+            # Resolve the spec first so a missing module is skipped cheaply.
+            if importlib.util.find_spec(name) is None:
+                continue
+            mod = importlib.import_module(name)
+            # Touching any attribute makes LazyLoader execute the module body.
+            getattr(mod, "__name__", None)
+        except Exception:
+            # Best effort only: the error resurfaces when the module is used.
+            continue
+
+def speed_up_modules(modules: List[str], preload: bool = False):
     """
     Forces the listed modules to be lazy-loaded globally.
     
     Args:
         modules: List of top-level package names (e.g., ["pandas", "boto3"])
+        preload: If True, start importing the modules in a background daemon
+            thread so the cost overlaps with argument parsing instead of
+            landing on the first real use. Only honoured where LazyLoader
+            locks the first access (CPython 3.13+ and recent 3.12 releases);
+            elsewhere it is ignored and the modules stay plain lazy imports.
     """
     global _INSTALLED_FINDER
     
     unsafe = {"numpy", "torch", "pydantic"}
-    safe_modules = [m for m in modules if m not in unsafe]
+    # Interned names let find_spec's membership test hit the identity fast path.
+    safe_modules = [sys.intern(m) for m in modules if m not in unsafe]
     
     if _INSTALLED_FINDER is None:
         _INSTALLED_FINDER = _LazyFinder(safe_modules)
         sys.meta_path.insert(0, _INSTALLED_FINDER)
     else:
-        _INSTALLED_FINDER.names.update(safe_modules)
-
+        _INSTALLED_FINDER.names = _INSTALLED_FINDER.names | frozenset(safe_modules)
+        # Someone may have rebuilt sys.meta_path since; re-insert without duplicating.
+        if _INSTALLED_FINDER not in sys.meta_path:
+            sys.meta_path.insert(0, _INSTALLED_FINDER)
 
-# @contextmanager
-# def lazy_imports():
-#     """
-#     Context manager syntax.
-    
-#     Usage:
-#         with lazy_imports():
-#             import pandas as pd
-#             import numpy as np
-#     """
-#     # We can't easily make 'with' work without hacking sys.meta_path anyway,
-#     # but typically users prefer the 'speed_up_modules' approach for global scripts.
-#     # For a true 'local' context manager, we'd need AST manipulation which is unsafe.
-#     # Instead, we'll use the same MetaPath trick but only for the duration of the block.
-#     raise NotImplementedError("Use 'speed_up_modules([...])' at the top of your file instead. It's safer and cleaner.")
+    if preload and _lazy_loader_locks():
+        thread = threading.Thread(target=_warm, args=(safe_modules,), daemon=True)
+        _PRELOAD_THREADS.append(thread)
+        thread.start()
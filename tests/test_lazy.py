@@ -1,25 +1,61 @@
+import collections.abc
+import contextlib
+import importlib
+import os
+import subprocess
 import sys
+import time
+import types
 import pytest
-from cli_speeder import lazy_import, lazy_from_import
+from cli_speeder import lazy_import, lazy_from_import, speed_up_modules
+from cli_speeder import core
+
+@pytest.fixture
+def isolated_finder():
+    """Uninstalls the finder set up by speed_up_modules once the test is done."""
+    yield
+    finder = core._INSTALLED_FINDER
+    if finder is not None:
+        sys.meta_path[:] = [f for f in sys.meta_path if f is not finder]
+    core._INSTALLED_FINDER = None
+    core._MODULE_CACHE.clear()
+    for thread in core._PRELOAD_THREADS:
+        thread.join(timeout=5)
+    core._PRELOAD_THREADS.clear()
 
 def test_lazy_module_import():
     mod_name = "http.client"
     if mod_name in sys.modules:
         del sys.modules[mod_name]
     
-    # Create proxy
+    # Create lazy module: registered, but its body has not run yet
     lazy_http = lazy_import(mod_name)
-    assert mod_name not in sys.modules, "Module should not be loaded on proxy creation"
-    assert "LazyModuleProxy" in repr(lazy_http)
+    assert sys.modules[mod_name] is lazy_http
+    assert type(lazy_http) is not types.ModuleType, "Module should not be executed on creation"
     
     # Access attribute -> triggers load
     port = lazy_http.HTTP_PORT
     assert port == 80
     
     # Verify IS loaded now
-    assert mod_name in sys.modules, "Module should be loaded after attribute access"
+    assert type(lazy_http) is types.ModuleType, "Lazy layer should be gone after load"
     assert str(lazy_http).startswith("<module 'http.client'")  # standard repr
 
+def test_lazy_module_is_the_real_module():
+    """Test that globals rebound by the module are visible through the lazy import."""
+    mod_name = "mimetypes"
+    if mod_name in sys.modules:
+        del sys.modules[mod_name]
+
+    lazy_mimetypes = lazy_import(mod_name)
+    lazy_mimetypes.init()  # rebinds the module-level 'inited' global
+    assert lazy_mimetypes.inited
+    assert sys.modules[mod_name] is lazy_mimetypes
+
+    lazy_mimetypes.cli_speeder_marker = 1
+    assert sys.modules[mod_name].cli_speeder_marker == 1
+    assert importlib.reload(lazy_mimetypes) is lazy_mimetypes
+
 def test_lazy_object_import():
     mod_name = "json"
     cls_name = "JSONDecoder"
@@ -36,6 +72,11 @@ def test_lazy_object_import():
     assert hasattr(decoder, "decode")
     assert mod_name in sys.modules
 
+    # A new proxy must re-import once the module has left sys.modules
+    del sys.modules[mod_name]
+    assert hasattr(lazy_from_import(mod_name, cls_name)(), "decode")
+    assert mod_name in sys.modules
+
 def test_lazy_list_behavior():
     """Test that magic methods like __getitem__ trigger the load."""
     # We'll lazily import 'sys' just to access 'argv' (which is a list)
@@ -51,14 +92,221 @@ def test_lazy_list_behavior():
         
     assert isinstance(lazy_sys.path, list)
 
-def test_eager_loading_env_var(monkeypatch):
+def test_eager_loading_env_var():
     """Test that setting CLI_SPEEDER_EAGER=1 forces immediate load."""
-    monkeypatch.setenv("CLI_SPEEDER_EAGER", "1")
-    mod_name = "uuid" 
-    
+    # The flag is read once when cli_speeder is imported, so check it in a fresh interpreter.
+    code = (
+        "import sys\n"
+        "from cli_speeder import lazy_import, lazy_from_import, speed_up_modules\n"
+        "_ = lazy_import('uuid')\n"
+        "_ = lazy_from_import('http.client', 'HTTP_PORT')\n"
+        "assert 'uuid' in sys.modules, 'Should have loaded immediately due to env var'\n"
+        "assert 'http.client' in sys.modules, 'Should have loaded immediately due to env var'\n"
+    )
+    env = dict(os.environ, CLI_SPEEDER_EAGER="1")
+    env["PYTHONPATH"] = os.pathsep.join(p for p in sys.path if p)
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+needs_locking_lazy_loader = pytest.mark.skipif(
+    not core._lazy_loader_locks(), reason="LazyLoader does not lock the first access here"
+)
+
+def _join_preload_threads():
+    for thread in core._PRELOAD_THREADS:
+        thread.join(timeout=5)
+        assert not thread.is_alive(), "Preload thread never finished"
+
+@needs_locking_lazy_loader
+def test_speed_up_modules_preload(isolated_finder):
+    """Test that preload=True executes the module in the background."""
+    mod_name = "colorsys"
     if mod_name in sys.modules:
         del sys.modules[mod_name]
-        
-    _ = lazy_import(mod_name)
-    
-    assert mod_name in sys.modules, "Should have loaded immediately due to env var"
+
+    speed_up_modules([mod_name], preload=True)
+    _join_preload_threads()
+
+    module = sys.modules[mod_name]
+    assert type(module) is types.ModuleType
+    assert "rgb_to_hsv" in vars(module), "Module body should have run to completion"
+
+@needs_locking_lazy_loader
+def test_preload_first_use_waits_for_module_body(isolated_finder, tmp_path, monkeypatch):
+    """Test that using a module mid-preload blocks until its body has finished."""
+    (tmp_path / "slow_preload_mod.py").write_text("import time\ntime.sleep(0.3)\nVALUE = 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    speed_up_modules(["slow_preload_mod"], preload=True)
+    time.sleep(0.1)  # let the preload thread get into the module body
+    import slow_preload_mod
+    assert slow_preload_mod.VALUE == 1
+    _join_preload_threads()
+
+@pytest.mark.skipif(core._lazy_loader_locks(), reason="LazyLoader locks the first access here")
+def test_preload_ignored_without_locking_lazy_loader(isolated_finder):
+    """Test that preload=True is a no-op where a concurrent first access would be unsafe."""
+    mod_name = "colorsys"
+    if mod_name in sys.modules:
+        del sys.modules[mod_name]
+
+    speed_up_modules([mod_name], preload=True)
+    assert core._PRELOAD_THREADS == []
+
+    import colorsys
+    assert type(colorsys) is not types.ModuleType, "Module should still be lazy"
+    assert colorsys.rgb_to_hsv(1, 0, 0)[0] == 0
+
+def test_isinstance_does_not_force_load():
+    """Test that isinstance() and __doc__ on an unloaded proxy do not import the module."""
+    mod_name = "quopri"
+    if mod_name in sys.modules:
+        del sys.modules[mod_name]
+
+    lazy_encode = lazy_from_import(mod_name, "encodestring")
+    assert not isinstance(lazy_encode, types.FunctionType)
+    assert lazy_encode.__doc__ == "<lazy proxy, not yet loaded>"
+    assert mod_name not in sys.modules
+
+    assert lazy_encode(b"a") == b"a"  # triggers load
+    assert isinstance(lazy_encode, types.FunctionType)
+    assert lazy_encode.__doc__ == sys.modules[mod_name].encodestring.__doc__
+
+def test_speed_up_modules_installs_finder_once(isolated_finder):
+    """Test that repeated calls never duplicate the finder and restore a removed one."""
+    speed_up_modules(["wave"])
+    finder = core._INSTALLED_FINDER
+    speed_up_modules(["chunk"])
+    assert sum(f is finder for f in sys.meta_path) == 1
+
+    sys.meta_path.remove(finder)
+    speed_up_modules(["wave"])
+    assert sum(f is finder for f in sys.meta_path) == 1
+
+def test_attach_lazy(tmp_path, monkeypatch):
+    """Test that attach_lazy defers the submodule import and caches the attribute."""
+    pkg = tmp_path / "lazy_pkg"
+    pkg.mkdir()
+    (pkg / "__init__.py").write_text(
+        "from cli_speeder import attach_lazy\n"
+        "__getattr__, __dir__ = attach_lazy(__name__, {'heavy': '._heavy'})\n"
+    )
+    (pkg / "_heavy.py").write_text("def heavy():\n    return 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    import lazy_pkg
+    assert "lazy_pkg._heavy" not in sys.modules
+    assert "heavy" in dir(lazy_pkg)
+
+    assert lazy_pkg.heavy() == 42
+    assert "lazy_pkg._heavy" in sys.modules
+    assert "heavy" in vars(lazy_pkg), "Attribute should be cached on the package"
+
+    with pytest.raises(AttributeError):
+        lazy_pkg.missing
+
+def test_forwarded_dunders():
+    """Test that protocol and operator dunders (len, in, iter, ==, <, +, reflected) reach the target."""
+    responses = lazy_from_import("http.client", "responses")
+    assert bool(responses)  # triggers load
+    assert len(responses) > 0
+    assert 404 in responses
+    assert sorted(responses)[0] == min(responses)
+
+    port = lazy_from_import("http.client", "HTTP_PORT")
+    assert port == 80 and not port != 80
+    assert port + 1 == 81 and 1 + port == 81
+    assert port - 1 == 79 and 100 - port == 20
+    assert port * 2 == 160 and 2 * port == 160
+    assert port / 2 == 40 and 160 / port == 2
+    assert port < 443 and port <= 80 and port > 3 and port >= 80
+    assert 3 < port and 80 <= port
+    assert hash(port) == hash(80)
+
+def test_protocol_abcs_follow_the_target():
+    """Test that container/iterator ABCs only match when the target supports them."""
+    abcs = (collections.abc.Iterable, collections.abc.Iterator, collections.abc.Sized,
+            collections.abc.Container, contextlib.AbstractContextManager)
+
+    port = lazy_from_import("http.client", "HTTP_PORT")
+    assert not any(isinstance(port, abc) for abc in abcs), "Unloaded proxy claims a protocol"
+    assert port == 80  # triggers load
+    assert not any(isinstance(port, abc) for abc in abcs), "Loaded int proxy claims a protocol"
+
+    responses = lazy_from_import("http.client", "responses")
+    assert responses[404] == "Not Found"  # triggers load
+    assert isinstance(responses, collections.abc.Sized)
+    assert not isinstance(responses, collections.abc.Iterator)
+
+def test_finder_cache_sees_in_place_meta_path_edits():
+    """Test that replacing a sys.meta_path entry in place refreshes the delegate list."""
+    class _Finder:
+        def find_spec(self, fullname, path, target=None):
+            return None
+
+    finder = core._LazyFinder(["wave"])
+    old, new = _Finder(), _Finder()
+    sys.meta_path.append(old)
+    try:
+        assert old in finder._other_finders()
+        sys.meta_path[-1] = new
+        finders = finder._other_finders()
+        assert new in finders and old not in finders
+    finally:
+        sys.meta_path[:] = [f for f in sys.meta_path if f is not old and f is not new]
+
+def test_proxy_subclass_must_implement_load():
+    """Test that a proxy without a _load() override fails at instantiation."""
+    class Incomplete(core._LazyProxy):
+        __slots__ = ()
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_proxy_subclass_keeps_its_docstring():
+    """Test that a documented proxy subclass is not overwritten by the __doc__ property."""
+    class Documented(core.LazyObjectProxy):
+        """Proxy with its own docs."""
+        __slots__ = ()
+
+    assert Documented.__doc__ == "Proxy with its own docs."
+
+def test_lazy_import_defers_parent_packages(tmp_path, monkeypatch):
+    """Test that lazy_import('pkg.sub') runs neither body until first use, parent first."""
+    pkg = tmp_path / "lazy_parent"
+    pkg.mkdir()
+    (tmp_path / "lazy_order_log.py").write_text("events = []\n")
+    (pkg / "__init__.py").write_text("import lazy_order_log\nlazy_order_log.events.append('parent')\n")
+    (pkg / "sub.py").write_text("import lazy_order_log\nlazy_order_log.events.append('sub')\nVALUE = 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import lazy_order_log
+
+    lazy_sub = lazy_import("lazy_parent.sub")
+    assert lazy_order_log.events == [], "Neither package body should run on creation"
+    assert sys.modules["lazy_parent.sub"] is lazy_sub
+
+    assert lazy_sub.VALUE == 1
+    assert lazy_order_log.events == ["parent", "sub"]
+    import lazy_parent
+    assert lazy_parent.sub is lazy_sub
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_finder_state_reset_after_fork(isolated_finder):
+    """Test that a forked child starts with clean finder caches and the finder installed."""
+    speed_up_modules(["wave"])
+    finder = core._INSTALLED_FINDER
+    finder._other_finders()  # populate the cache
+    finder._in_lookup.add(-1)  # a parent thread id that means nothing in the child
+
+    pid = os.fork()
+    if pid == 0:
+        # Child: report through the exit code and never return into pytest.
+        ok = (
+            finder._in_lookup == set()
+            and finder._cached_finders is None
+            and any(f is finder for f in sys.meta_path)
+        )
+        os._exit(0 if ok else 1)
+
+    _, status = os.waitpid(pid, 0)
+    finder._in_lookup.discard(-1)
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0, "Child kept stale finder state"